@@ -1,6 +1,7 @@
 import src.DBManager
 import src.utils_hh
 from src.vacancyManager import VacancyManager
+from src.vacancy_spool import VacancySpool
 from src.config import load_config
 
 
@@ -78,6 +79,9 @@ def menu(db_manager):
         elif choice == "0":
             # Выход из программы
             print("Выход из программы.")
+            stats = db_manager.cache.stats()
+            print(f"Кэш запросов: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                  f"доля попаданий {stats['hit_ratio']:.0%}")
             break
 
         else:
@@ -104,8 +108,13 @@ db_manager.create_database(new_db_name)
 new_schema_name = input("Введите имя для новой схемы: ")
 db_manager.create_tables(new_schema_name)
 
-# Создаем менеджер вакансий, передавая db_manager
-vacancy_manager = VacancyManager(db_manager)
+# Создаем журнал вакансий и запускаем фоновую загрузку в базу,
+# включая вакансии, не загруженные при прошлом запуске
+vacancy_spool = VacancySpool(db_manager)
+vacancy_spool.start()
+
+# Создаем менеджер вакансий, передавая db_manager и журнал
+vacancy_manager = VacancyManager(db_manager, vacancy_spool)
 
 # Получаем случайные вакансии
 vacancies = vacancy_manager.get_random_vacancies(count=30)
@@ -119,5 +128,8 @@ vacancy_manager.add_employers_interactive(employers)
 # Добавляем вакансии для всех компаний, которые уже есть в базе данных
 vacancy_manager.add_vacancies_for_all_companies()
 
+# Дожидаемся загрузки всех вакансий из журнала в базу данных
+vacancy_spool.close()
+
 # Запуск основного меню программы
 menu(db_manager)
@@ -1,10 +1,14 @@
+import io
+
 import psycopg2
 from psycopg2 import sql
-from src.utils import convert_salary
+from src.utils import normalize_vacancy, format_copy_row, VACANCY_COLUMNS
+from src.query_cache import QueryCache
 
 
 class DBManager:
-    def __init__(self, dbname, user, password, host='localhost', port=5432):
+    def __init__(self, dbname, user, password, host='localhost', port=5432, cache_size=128, cache_ttl=300,
+                 cache_rows=50000):
         """
         Инициализация объекта DBManager.
 
@@ -13,6 +17,9 @@ class DBManager:
         :param password: Пароль пользователя базы данных.
         :param host: Хост базы данных (по умолчанию 'localhost').
         :param port: Порт базы данных (по умолчанию 5432).
+        :param cache_size: Максимальное количество результатов запросов в кэше (по умолчанию 128).
+        :param cache_ttl: Время жизни результата в кэше в секундах (по умолчанию 300).
+        :param cache_rows: Максимальное суммарное количество строк результатов в кэше (по умолчанию 50000).
         """
         self.dbname = dbname
         self.user = user
@@ -22,6 +29,7 @@ class DBManager:
         self.conn = None
         self.cur = None
         self.schema_name = ""
+        self.cache = QueryCache(cache_size, cache_ttl, cache_rows)
 
     def connect(self, dbname=None):
         """
@@ -119,6 +127,7 @@ class DBManager:
             """)
 
             self.conn.commit()
+            self.cache.invalidate(self.dbname, self.schema_name)
             print("Таблицы успешно созданы.")
         except psycopg2.Error as e:
             print(f"Ошибка при создании таблиц: {e}")
@@ -141,6 +150,7 @@ class DBManager:
                 (name, item_id))
             company_id = self.cur.fetchone()[0]
             self.conn.commit()
+            self.cache.invalidate(self.dbname, self.schema_name)
             return company_id
         except psycopg2.Error as e:
             print(f"Ошибка при добавлении компании '{name}': {e}")
@@ -168,6 +178,7 @@ class DBManager:
                 (name, salary_from, salary_to, company_id, requirement, location)
             )
             self.conn.commit()
+            self.cache.invalidate(self.dbname, self.schema_name)
         except psycopg2.Error as e:
             print(f"Ошибка при добавлении вакансии '{name}': {e}")
         finally:
@@ -181,6 +192,7 @@ class DBManager:
         try:
             self.cur.execute(f'TRUNCATE "{self.schema_name}"."COMPANY" CASCADE;')
             self.conn.commit()
+            self.cache.invalidate(self.dbname, self.schema_name)
         except psycopg2.Error as e:
             print(f"Ошибка при очистке таблицы компаний: {e}")
             self.conn.rollback()
@@ -193,47 +205,134 @@ class DBManager:
 
         :param vacancy_json: Объект вакансии в формате JSON.
         """
-        if not vacancy_json:
-            print("Ошибка: передан пустой объект вакансии")
+        vacancy = normalize_vacancy(vacancy_json)
+        if vacancy is None:
             return
 
-        name = vacancy_json.get("name", "Не указано")
-
-        # Обработка зарплаты (зарплата может быть None)
-        salary = vacancy_json.get("salary", {})
-        salary_from = None
-        salary_to = None
-        if salary:
-            salary_from = convert_salary(salary.get("from"), salary.get("currency"))
-            salary_to = convert_salary(salary.get("to"), salary.get("currency"))
-
-        # Проверка на наличие данных о компании
-        employer = vacancy_json.get("employer", {})
-        company_id = employer.get("id")
-        if not company_id:
-            print(f"Ошибка: Не удалось получить ID компании для вакансии '{name}'")
-            return
+        # Вызов функции insert_vacancy с полученными данными
+        try:
+            self.insert_vacancy(**vacancy)
+        except Exception as e:
+            print(f"Ошибка при добавлении вакансии '{vacancy['name']}': {e}")
+
+    def new_connection(self, dbname):
+        """
+        Открывает отдельное соединение с базой данных, не затрагивая self.conn и self.cur.
+
+        :param dbname: Имя базы данных.
+        :return: Соединение psycopg2 или None, если подключиться не удалось.
+        """
+        try:
+            return psycopg2.connect(
+                dbname=dbname,
+                user=self.user,
+                password=self.password,
+                host=self.host,
+                port=self.port
+            )
+        except psycopg2.Error as e:
+            print(f"Ошибка подключения к базе данных '{dbname}': {e}")
+            return None
 
-        # Требования могут отсутствовать
-        snippet = vacancy_json.get("snippet", {})
-        requirement = snippet.get("requirement", "Не указано")
+    def copy_vacancies(self, vacancies, dbname=None, schema_name=None):
+        """
+        Загружает пачку вакансий в базу данных одной командой COPY.
 
-        # Локация может быть не указана
-        area = vacancy_json.get("area", {})
-        location = area.get("name", "Не указано")
+        Использует отдельное соединение, поэтому может вызываться из фонового потока.
 
-        # Вызов функции insert_vacancy с полученными данными
+        :param vacancies: Список словарей с полями вакансий (см. normalize_vacancy).
+        :param dbname: Имя базы данных (если не указано, используется текущее имя).
+        :param schema_name: Имя схемы (если не указано, используется текущая схема).
+        :return: True, если пачка загружена, False, если база отклонила данные пачки,
+                 None, если база данных недоступна или соединение прервалось.
+        """
+        if dbname is None:
+            dbname = self.dbname
+        if schema_name is None:
+            schema_name = self.schema_name
+
+        buffer = io.StringIO("".join(format_copy_row(vacancy) for vacancy in vacancies))
+
+        conn = self.new_connection(dbname)
+        if conn is None:
+            return None
+
+        cur = conn.cursor()
         try:
-            self.insert_vacancy(
-                name=name,
-                salary_from=salary_from,
-                salary_to=salary_to,
-                company_id=company_id,
-                requirement=requirement,
-                location=location
+            cur.copy_expert(
+                f"""
+                COPY "{schema_name}"."VACANCY" ("NAME", "SALARY_FROM", "SALARY_TO", "COMPANY_ID", "REQUIREMENT", "LOCATION")
+                FROM STDIN;
+                """,
+                buffer
             )
-        except Exception as e:
-            print(f"Ошибка при добавлении вакансии '{name}': {e}")
+            conn.commit()
+            self.cache.invalidate(dbname, schema_name)
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            # Соединение прервано: транзакция откатится при закрытии, пачку нужно повторить позже
+            print(f"Ошибка соединения при загрузке пачки вакансий: {e}")
+            return None
+        except psycopg2.Error as e:
+            print(f"Ошибка при загрузке пачки вакансий: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cur.close()
+            conn.close()
+
+    def insert_vacancies_by_row(self, vacancies, dbname=None, schema_name=None):
+        """
+        Загружает вакансии по одной в одной транзакции, отделяя каждую точкой сохранения.
+        Вакансии, отклоненные базой, пропускаются, остальные фиксируются вместе.
+
+        Использует отдельное соединение, поэтому может вызываться из фонового потока.
+
+        :param vacancies: Список словарей с полями вакансий (см. normalize_vacancy).
+        :param dbname: Имя базы данных (если не указано, используется текущее имя).
+        :param schema_name: Имя схемы (если не указано, используется текущая схема).
+        :return: Список отклоненных вакансий или None, если база данных недоступна
+                 или соединение прервалось (тогда ни одна вакансия не сохранена).
+        """
+        if dbname is None:
+            dbname = self.dbname
+        if schema_name is None:
+            schema_name = self.schema_name
+
+        conn = self.new_connection(dbname)
+        if conn is None:
+            return None
+
+        cur = conn.cursor()
+        rejected = []
+        try:
+            for vacancy in vacancies:
+                cur.execute("SAVEPOINT vacancy;")
+                try:
+                    cur.execute(
+                        f"""
+                        INSERT INTO "{schema_name}"."VACANCY" ("NAME", "SALARY_FROM", "SALARY_TO", "COMPANY_ID", "REQUIREMENT", "LOCATION")
+                        VALUES (%s, %s, %s, %s, %s, %s);
+                        """,
+                        [vacancy[column] for column in VACANCY_COLUMNS]
+                    )
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except psycopg2.Error as e:
+                    print(f"Ошибка при добавлении вакансии '{vacancy['name']}': {e}")
+                    cur.execute("ROLLBACK TO SAVEPOINT vacancy;")
+                    rejected.append(vacancy)
+                else:
+                    cur.execute("RELEASE SAVEPOINT vacancy;")
+            conn.commit()
+            self.cache.invalidate(dbname, schema_name)
+            return rejected
+        except psycopg2.Error as e:
+            print(f"Ошибка соединения при загрузке вакансий: {e}")
+            return None
+        finally:
+            cur.close()
+            conn.close()
 
     def company_exists(self, company_id):
         """
@@ -274,6 +373,11 @@ class DBManager:
 
         :return: Список кортежей (название компании, количество вакансий).
         """
+        key = self.cache.make_key(self.dbname, self.schema_name, 'get_companies_and_vacancies_count')
+        found, result = self.cache.get(key)
+        if found:
+            return result
+
         self.connect()
         try:
             self.cur.execute(f'''
@@ -282,7 +386,9 @@ class DBManager:
                 LEFT JOIN "{self.schema_name}"."VACANCY" V ON C."COMPANY_ID" = V."COMPANY_ID"
                 GROUP BY C."NAME";
             ''')
-            return self.cur.fetchall()
+            result = self.cur.fetchall()
+            self.cache.put(key, result)
+            return result
         except psycopg2.Error as e:
             print(f"Ошибка при получении количества вакансий для компаний: {e}")
             return []
@@ -295,6 +401,11 @@ class DBManager:
 
         :return: Список кортежей (название вакансии, название компании, зарплата от, зарплата до).
         """
+        key = self.cache.make_key(self.dbname, self.schema_name, 'get_all_vacancies')
+        found, result = self.cache.get(key)
+        if found:
+            return result
+
         self.connect()
         try:
             self.cur.execute(f"""
@@ -302,7 +413,9 @@ class DBManager:
                 FROM "{self.schema_name}"."VACANCY" V
                 JOIN "{self.schema_name}"."COMPANY" C ON V."COMPANY_ID" = C."COMPANY_ID";
             """)
-            return self.cur.fetchall()
+            result = self.cur.fetchall()
+            self.cache.put(key, result)
+            return result
         except psycopg2.Error as e:
             print(f"Ошибка при получении всех вакансий: {e}")
             return []
@@ -315,6 +428,11 @@ class DBManager:
 
         :return: Средняя зарплата или None в случае ошибки.
         """
+        key = self.cache.make_key(self.dbname, self.schema_name, 'get_avg_salary')
+        found, result = self.cache.get(key)
+        if found:
+            return result
+
         self.connect()
         try:
             self.cur.execute(f"""
@@ -322,7 +440,9 @@ class DBManager:
                 FROM "{self.schema_name}"."VACANCY" V
                 WHERE V."SALARY_FROM" IS NOT NULL AND V."SALARY_TO" IS NOT NULL;
             """)
-            return self.cur.fetchone()[0]
+            result = self.cur.fetchone()[0]
+            self.cache.put(key, result)
+            return result
         except psycopg2.Error as e:
             print(f"Ошибка при получении средней зарплаты: {e}")
             return None
@@ -339,6 +459,11 @@ class DBManager:
         if avg_salary is None:
             return []
 
+        key = self.cache.make_key(self.dbname, self.schema_name, 'get_vacancies_with_higher_salary')
+        found, result = self.cache.get(key)
+        if found:
+            return result
+
         self.connect()
         try:
             self.cur.execute(f"""
@@ -346,7 +471,9 @@ class DBManager:
                 FROM "{self.schema_name}"."VACANCY" V
                 WHERE V."SALARY_FROM" > %s OR V."SALARY_TO" > %s;
             """, (avg_salary, avg_salary))
-            return self.cur.fetchall()
+            result = self.cur.fetchall()
+            self.cache.put(key, result)
+            return result
         except psycopg2.Error as e:
             print(f"Ошибка при получении вакансий с зарплатой выше средней: {e}")
             return []
@@ -360,6 +487,11 @@ class DBManager:
         :param keyword: Ключевое слово для поиска.
         :return: Список кортежей (название вакансии).
         """
+        key = self.cache.make_key(self.dbname, self.schema_name, 'get_vacancies_with_keyword', keyword)
+        found, result = self.cache.get(key)
+        if found:
+            return result
+
         self.connect()
         try:
             self.cur.execute(f"""
@@ -367,7 +499,9 @@ class DBManager:
                 FROM "{self.schema_name}"."VACANCY" V
                 WHERE V."NAME" ILIKE %s;
             """, ('%' + keyword + '%',))
-            return self.cur.fetchall()
+            result = self.cur.fetchall()
+            self.cache.put(key, result)
+            return result
         except psycopg2.Error as e:
             print(f"Ошибка при получении вакансий с ключевым словом '{keyword}': {e}")
             return []
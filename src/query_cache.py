@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    def __init__(self, max_entries=128, ttl=300, max_rows=50000):
+        """
+        Инициализация кэша результатов запросов.
+
+        :param max_entries: Максимальное количество записей в кэше (по умолчанию 128).
+        :param ttl: Время жизни записи в секундах (по умолчанию 300).
+        :param max_rows: Максимальное суммарное количество строк результатов в кэше (по умолчанию 50000).
+                         Результаты больше этого лимита не кэшируются.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.entries = OrderedDict()  # ключ -> (время сохранения, количество строк, результат)
+        self.rows = 0  # суммарное количество строк в кэше
+        self.generations = {}  # (база данных, схема) -> номер поколения данных
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # кэш сбрасывается и из фонового потока загрузки вакансий
+
+    @staticmethod
+    def count_rows(value):
+        """
+        Оценивает размер результата запроса в строках.
+
+        :param value: Результат запроса.
+        :return: Количество строк для списка, 1 для скалярного значения.
+        """
+        return len(value) if isinstance(value, list) else 1
+
+    def make_key(self, dbname, schema_name, method_name, *args):
+        """
+        Формирует ключ кэша из базы данных, схемы, текущего поколения, имени метода и аргументов.
+
+        :param dbname: Имя базы данных.
+        :param schema_name: Имя схемы.
+        :param method_name: Имя метода DBManager.
+        :param args: Аргументы метода.
+        :return: Кортеж-ключ.
+        """
+        with self.lock:
+            scope = (dbname, schema_name)
+            return scope, self.generations.get(scope, 0), method_name, args
+
+    def get(self, key):
+        """
+        Возвращает результат из кэша.
+
+        :param key: Ключ кэша.
+        :return: Кортеж (найдено ли значение, значение).
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_at, rows, value = entry
+                if time.monotonic() - stored_at < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self.remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """
+        Сохраняет результат в кэше, вытесняя самые старые записи при превышении лимитов.
+
+        :param key: Ключ кэша.
+        :param value: Результат запроса.
+        """
+        rows = self.count_rows(value)
+        with self.lock:
+            # Результат, посчитанный до смены поколения, уже устарел
+            if key[1] != self.generations.get(key[0], 0):
+                return
+            # Слишком большой результат вытеснил бы весь кэш
+            if rows > self.max_rows:
+                return
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (time.monotonic(), rows, value)
+            self.rows += rows
+            while len(self.entries) > self.max_entries or self.rows > self.max_rows:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        """
+        Удаляет запись из кэша. Вызывается под self.lock.
+
+        :param key: Ключ кэша.
+        """
+        stored_at, rows, value = self.entries.pop(key)
+        self.rows -= rows
+
+    def invalidate(self, dbname, schema_name):
+        """
+        Увеличивает поколение данных схемы и удаляет устаревшие записи.
+
+        :param dbname: Имя базы данных.
+        :param schema_name: Имя схемы, данные которой изменились.
+        """
+        scope = (dbname, schema_name)
+        with self.lock:
+            self.generations[scope] = self.generations.get(scope, 0) + 1
+            for key in [key for key in self.entries if key[0] == scope]:
+                self.remove(key)
+
+    def stats(self):
+        """
+        Возвращает статистику работы кэша.
+
+        :return: Словарь с количеством попаданий, промахов, долей попаданий, размером кэша и числом строк в нем.
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'size': len(self.entries),
+                'rows': self.rows,
+            }
@@ -14,3 +14,72 @@ def convert_salary(currency_value, currency_name):
         return currency_value * 0.19
     else:
         return currency_value
+
+
+def normalize_vacancy(vacancy_json):
+    """
+    Приводит вакансию из JSON ответа HH.ru к набору полей таблицы VACANCY.
+
+    :param vacancy_json: Объект вакансии в формате JSON.
+    :return: Словарь с полями вакансии или None, если вакансию нельзя сохранить.
+    """
+    if not vacancy_json:
+        print("Ошибка: передан пустой объект вакансии")
+        return None
+
+    name = vacancy_json.get("name", "Не указано")
+
+    # Обработка зарплаты (зарплата может быть None)
+    salary = vacancy_json.get("salary", {})
+    salary_from = None
+    salary_to = None
+    if salary:
+        salary_from = convert_salary(salary.get("from"), salary.get("currency"))
+        salary_to = convert_salary(salary.get("to"), salary.get("currency"))
+
+    # Проверка на наличие данных о компании
+    employer = vacancy_json.get("employer", {})
+    company_id = employer.get("id")
+    if not company_id:
+        print(f"Ошибка: Не удалось получить ID компании для вакансии '{name}'")
+        return None
+
+    # Требования могут отсутствовать
+    snippet = vacancy_json.get("snippet", {})
+    requirement = snippet.get("requirement", "Не указано")
+
+    # Локация может быть не указана
+    area = vacancy_json.get("area", {})
+    location = area.get("name", "Не указано")
+
+    return {
+        "name": name,
+        "salary_from": salary_from,
+        "salary_to": salary_to,
+        "company_id": company_id,
+        "requirement": requirement,
+        "location": location,
+    }
+
+
+# Порядок полей вакансии при пакетной загрузке через COPY
+VACANCY_COLUMNS = ("name", "salary_from", "salary_to", "company_id", "requirement", "location")
+
+
+def format_copy_row(vacancy):
+    """
+    Формирует строку вакансии для COPY в текстовом формате PostgreSQL.
+    None записывается как \\N и загружается как NULL, пустая строка остается пустой строкой.
+
+    :param vacancy: Словарь с полями вакансии (см. normalize_vacancy).
+    :return: Строка с полями, разделенными табуляцией, и переводом строки в конце.
+    """
+    fields = []
+    for column in VACANCY_COLUMNS:
+        value = vacancy[column]
+        if value is None:
+            fields.append("\\N")
+        else:
+            fields.append(str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                          .replace("\n", "\\n").replace("\r", "\\r"))
+    return "\t".join(fields) + "\n"
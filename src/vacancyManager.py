@@ -1,10 +1,18 @@
 import requests
 import random
 
+from src.utils import normalize_vacancy
+
 
 class VacancyManager:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, spool=None):
+        """
+        :param db_manager: Объект DBManager.
+        :param spool: Объект VacancySpool; если указан, вакансии пишутся в локальный журнал
+                      и загружаются в базу фоновым потоком, не задерживая получение данных.
+        """
         self.db_manager = db_manager
+        self.spool = spool
         self.base_url = "https://api.hh.ru/vacancies"
 
     def get_random_vacancies(self, count=10):
@@ -108,6 +116,13 @@ class VacancyManager:
         vacancies = self.get_vacancies_by_company(company_id, count)
 
         for vacancy in vacancies:
+            if self.spool is not None:
+                # Записываем вакансию в журнал, в базу её загрузит фоновый поток
+                record = normalize_vacancy(vacancy)
+                if record is not None:
+                    self.spool.write(record)
+                continue
+
             # Добавляем вакансию в базу данных
             try:
                 self.db_manager.insert_vacancy_from_json(vacancy)
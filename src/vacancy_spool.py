@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+# Имя файла сегмента: segment-<номер>.log, отклоненные базой записи - segment-<номер>.bad
+SEGMENT_PATTERN = re.compile(r'segment-(\d{8})\.(log|bad)')
+
+
+class VacancySpool:
+    def __init__(self, db_manager, directory='spool', segment_size=100, segment_age=5.0,
+                 fsync_policy='rotate', drain_interval=1.0):
+        """
+        Инициализация локального журнала вакансий.
+
+        Вакансии сначала дописываются в файлы-сегменты на диске, а фоновый поток
+        загружает закрытые сегменты в базу данных через DBManager.copy_vacancies.
+        Каждый сегмент помнит базу данных и схему, для которых получены вакансии,
+        поэтому сегменты, оставшиеся от прошлого запуска, загружаются туда же.
+
+        Доставка - "хотя бы один раз": если программа упадет между фиксацией транзакции
+        и удалением сегмента, сегмент будет загружен повторно и вакансии задублируются.
+        Компании в журнал не пишутся: они добавляются интерактивно по одной, и вакансии
+        ссылаются на них внешним ключом, поэтому компания должна быть в базе до загрузки вакансий.
+
+        :param db_manager: Объект DBManager для загрузки вакансий.
+        :param directory: Каталог для файлов-сегментов (по умолчанию 'spool').
+        :param segment_size: Количество вакансий, после которого сегмент закрывается (по умолчанию 100).
+        :param segment_age: Время в секундах, после которого сегмент закрывается (по умолчанию 5.0).
+        :param fsync_policy: Когда сбрасывать данные на диск: 'always' - после каждой записи,
+                             'rotate' - при закрытии сегмента, 'never' - полагаться на ОС.
+        :param drain_interval: Пауза в секундах между проверками новых сегментов (по умолчанию 1.0).
+        """
+        if fsync_policy not in ('always', 'rotate', 'never'):
+            raise ValueError(f"Неизвестная политика fsync: {fsync_policy}")
+
+        self.db_manager = db_manager
+        self.directory = directory
+        self.segment_size = segment_size
+        self.segment_age = segment_age
+        self.fsync_policy = fsync_policy
+        self.drain_interval = drain_interval
+
+        os.makedirs(self.directory, exist_ok=True)
+        existing = [int(match.group(1)) for match in map(SEGMENT_PATTERN.fullmatch, os.listdir(self.directory))
+                    if match]
+        self.next_segment = max(existing, default=0) + 1
+
+        self.lock = threading.Lock()
+        self.segment_file = None
+        self.segment_path = None
+        self.segment_records = 0
+        self.segment_opened = None
+        self.stop_event = threading.Event()
+        self.drain_thread = None
+
+    def list_segments(self):
+        """
+        Возвращает имена закрытых и текущего файлов сегментов в порядке их создания.
+
+        :return: Список имен файлов.
+        """
+        matches = [match for match in map(SEGMENT_PATTERN.fullmatch, os.listdir(self.directory))
+                   if match and match.group(2) == 'log']
+        return [match.group(0) for match in sorted(matches, key=lambda match: int(match.group(1)))]
+
+    @staticmethod
+    def format_line(record):
+        """
+        Формирует строку журнала: контрольная сумма CRC32 и запись в формате JSON.
+
+        :param record: Словарь для записи.
+        :return: Строка журнала с переводом строки в конце.
+        """
+        payload = json.dumps(record, ensure_ascii=False)
+        return f"{zlib.crc32(payload.encode('utf-8')):08x}\t{payload}\n"
+
+    def write(self, vacancy):
+        """
+        Дописывает вакансию в текущий сегмент.
+
+        :param vacancy: Словарь с полями вакансии (см. normalize_vacancy).
+        """
+        line = self.format_line(vacancy)
+        with self.lock:
+            if self.segment_file is None:
+                self.segment_path = os.path.join(self.directory, f"segment-{self.next_segment:08d}.log")
+                self.next_segment += 1
+                self.segment_file = open(self.segment_path, 'a', encoding='utf-8')
+                self.segment_opened = time.monotonic()
+                # Первая строка сегмента - база данных и схема, в которые загружаются вакансии
+                self.segment_file.write(self.format_line({
+                    'dbname': self.db_manager.dbname,
+                    'schema_name': self.db_manager.schema_name,
+                }))
+
+            self.segment_file.write(line)
+            self.segment_records += 1
+            if self.fsync_policy == 'always':
+                self.segment_file.flush()
+                os.fsync(self.segment_file.fileno())
+
+            if self.segment_records >= self.segment_size:
+                self.rotate()
+
+    def rotate(self):
+        """
+        Закрывает текущий сегмент, после чего он становится доступен для загрузки.
+        Вызывается под self.lock.
+        """
+        if self.segment_file is None:
+            return
+        self.segment_file.flush()
+        if self.fsync_policy != 'never':
+            os.fsync(self.segment_file.fileno())
+        self.segment_file.close()
+        self.segment_file = None
+        self.segment_path = None
+        self.segment_records = 0
+        self.segment_opened = None
+
+    def read_segment(self, path):
+        """
+        Читает сегмент, пропуская поврежденные и недописанные строки.
+
+        :param path: Путь к файлу сегмента.
+        :return: Кортеж (заголовок с базой данных и схемой или None, список вакансий).
+        """
+        header = None
+        vacancies = []
+        # Файл читается в байтах: строка, оборванная при сбое, может заканчиваться посередине символа
+        with open(path, 'rb') as segment:
+            for line_number, line in enumerate(segment, 1):
+                checksum, _, payload = line.rstrip(b'\n').partition(b'\t')
+                try:
+                    valid = int(checksum, 16) == zlib.crc32(payload)
+                    payload = payload.decode('utf-8')
+                except ValueError:  # в том числе UnicodeDecodeError
+                    valid = False
+                if not valid:
+                    print(f"Пропущена поврежденная запись {line_number} в сегменте {path}")
+                    continue
+                if line_number == 1:
+                    header = json.loads(payload)
+                else:
+                    vacancies.append(json.loads(payload))
+        return header, vacancies
+
+    def reject(self, path, header, vacancies):
+        """
+        Откладывает вакансии, которые база данных не приняла, в файл .bad рядом с сегментом.
+        Файл имеет формат сегмента и может быть загружен повторно после переименования в .log.
+
+        :param path: Путь к файлу сегмента.
+        :param header: Заголовок сегмента с базой данных и схемой.
+        :param vacancies: Список отклоненных вакансий.
+        """
+        bad_path = path[:-len('.log')] + '.bad'
+        with open(bad_path, 'a', encoding='utf-8') as bad_file:
+            bad_file.write(self.format_line(header or {}))
+            for vacancy in vacancies:
+                bad_file.write(self.format_line(vacancy))
+        print(f"Вакансий не загружено в базу: {len(vacancies)}, они сохранены в файле {bad_path}")
+
+    def load_segment(self, path):
+        """
+        Загружает сегмент в базу данных одной пачкой. Если база отклонила пачку,
+        вакансии загружаются по одной, а отклоненные откладываются в файл .bad.
+
+        :param path: Путь к файлу сегмента.
+        :return: True, если сегмент обработан и удален, False, если база данных недоступна.
+        """
+        header, vacancies = self.read_segment(path)
+        if header is None:
+            # Без заголовка неизвестно, в какую схему загружать вакансии
+            if vacancies:
+                self.reject(path, header, vacancies)
+        elif vacancies:
+            target = {'dbname': header.get('dbname'), 'schema_name': header.get('schema_name')}
+            result = self.db_manager.copy_vacancies(vacancies, **target)
+            if result is None:
+                return False
+            if result is False:
+                # Загрузка по одной идет в одной транзакции: при обрыве соединения
+                # ничего не сохраняется и сегмент остается для повторной загрузки
+                rejected = self.db_manager.insert_vacancies_by_row(vacancies, **target)
+                if rejected is None:
+                    return False
+                if rejected:
+                    self.reject(path, header, rejected)
+        os.remove(path)
+        return True
+
+    def drain(self):
+        """
+        Загружает в базу данных все закрытые сегменты. Сегмент, база которого недоступна,
+        остается на диске и загружается при следующей попытке, не задерживая остальные.
+
+        :return: True, если все закрытые сегменты загружены, иначе False.
+        """
+        with self.lock:
+            active = os.path.basename(self.segment_path) if self.segment_path else None
+            closed = [name for name in self.list_segments() if name != active]
+
+        all_loaded = True
+        for name in closed:
+            try:
+                if not self.load_segment(os.path.join(self.directory, name)):
+                    all_loaded = False
+            except Exception as e:
+                print(f"Ошибка при загрузке сегмента {name}: {e}")
+                all_loaded = False
+        return all_loaded
+
+    def drain_loop(self):
+        """Фоновый цикл загрузки сегментов до вызова close."""
+        while not self.stop_event.is_set():
+            try:
+                with self.lock:
+                    # Закрываем давно открытый сегмент, чтобы загрузка шла параллельно с получением вакансий
+                    if self.segment_opened is not None and time.monotonic() - self.segment_opened >= self.segment_age:
+                        self.rotate()
+                self.drain()
+            except Exception as e:
+                print(f"Ошибка фоновой загрузки вакансий: {e}")
+            self.stop_event.wait(self.drain_interval)
+
+    def start(self):
+        """Запускает фоновую загрузку сегментов, включая оставшиеся от прошлого запуска."""
+        if self.drain_thread is None:
+            self.drain_thread = threading.Thread(target=self.drain_loop, daemon=True)
+            self.drain_thread.start()
+
+    def close(self):
+        """
+        Закрывает текущий сегмент, останавливает фоновый поток и загружает оставшиеся сегменты.
+        Незагруженные сегменты остаются на диске до следующего запуска.
+        """
+        with self.lock:
+            self.rotate()
+
+        self.stop_event.set()
+        if self.drain_thread is not None:
+            self.drain_thread.join()
+            self.drain_thread = None
+
+        if not self.drain():
+            print(f"Не все вакансии загружены в базу, они сохранены в каталоге '{self.directory}'.")
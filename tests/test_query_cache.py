@@ -0,0 +1,64 @@
+from unittest import mock
+
+from src.query_cache import QueryCache
+
+
+def test_hit_after_put_and_hit_ratio():
+    cache = QueryCache()
+    key = cache.make_key('db', 'schema', 'get_avg_salary')
+    assert cache.get(key) == (False, None)
+    cache.put(key, 100)
+    assert cache.get(key) == (True, 100)
+    assert cache.stats()['hit_ratio'] == 0.5
+
+
+def test_result_computed_before_invalidate_is_not_stored():
+    cache = QueryCache()
+    key = cache.make_key('db', 'schema', 'get_all_vacancies')
+    cache.invalidate('db', 'schema')
+    cache.put(key, [('Инженер',)])
+    assert cache.get(cache.make_key('db', 'schema', 'get_all_vacancies')) == (False, None)
+    assert cache.stats()['size'] == 0
+
+
+def test_invalidate_is_scoped_by_database_and_schema():
+    cache = QueryCache()
+    key = cache.make_key('old_db', 'schema', 'get_avg_salary')
+    cache.put(key, 100)
+    assert cache.get(cache.make_key('new_db', 'schema', 'get_avg_salary')) == (False, None)
+    cache.invalidate('new_db', 'schema')
+    assert cache.get(cache.make_key('old_db', 'schema', 'get_avg_salary')) == (True, 100)
+
+
+def test_entry_expires_after_ttl():
+    cache = QueryCache(ttl=10)
+    key = cache.make_key('db', 'schema', 'get_avg_salary')
+    with mock.patch('src.query_cache.time.monotonic', return_value=0):
+        cache.put(key, 100)
+    with mock.patch('src.query_cache.time.monotonic', return_value=10):
+        assert cache.get(key) == (False, None)
+    assert cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    keys = [cache.make_key('db', 'schema', 'get_vacancies_with_keyword', word) for word in ('a', 'b', 'c')]
+    cache.put(keys[0], [])
+    cache.put(keys[1], [])
+    cache.get(keys[0])
+    cache.put(keys[2], [])
+    assert cache.get(keys[0])[0] and cache.get(keys[2])[0]
+    assert cache.get(keys[1]) == (False, None)
+
+
+def test_rows_limit_bounds_cache():
+    cache = QueryCache(max_rows=5)
+    small = cache.make_key('db', 'schema', 'get_vacancies_with_keyword', 'a')
+    other = cache.make_key('db', 'schema', 'get_vacancies_with_keyword', 'b')
+    large = cache.make_key('db', 'schema', 'get_all_vacancies')
+    cache.put(large, [('v',)] * 6)
+    assert cache.stats()['size'] == 0
+    cache.put(small, [('v',)] * 3)
+    cache.put(other, [('v',)] * 3)
+    assert cache.get(small) == (False, None)
+    assert cache.stats()['rows'] == 3
@@ -0,0 +1,131 @@
+import os
+import time
+
+from src.utils import normalize_vacancy, format_copy_row
+from src.vacancy_spool import VacancySpool
+
+
+class FakeDBManager:
+    """Заменяет DBManager: принимает все вакансии, кроме вакансий с указанным названием."""
+
+    def __init__(self, bad_name=None):
+        self.dbname = 'db'
+        self.schema_name = 'schema'
+        self.bad_name = bad_name
+        self.loaded = []
+
+    def copy_vacancies(self, vacancies, dbname=None, schema_name=None):
+        if any(vacancy['name'] == self.bad_name for vacancy in vacancies):
+            return False
+        self.loaded.extend((dbname, schema_name, vacancy['name']) for vacancy in vacancies)
+        return True
+
+    def insert_vacancies_by_row(self, vacancies, dbname=None, schema_name=None):
+        rejected = [vacancy for vacancy in vacancies if vacancy['name'] == self.bad_name]
+        self.loaded.extend((dbname, schema_name, vacancy['name']) for vacancy in vacancies
+                           if vacancy['name'] != self.bad_name)
+        return rejected
+
+
+class OutageDBManager(FakeDBManager):
+    """Отклоняет пачку, после чего база данных становится недоступна."""
+
+    def insert_vacancies_by_row(self, vacancies, dbname=None, schema_name=None):
+        return None
+
+
+def make_vacancy(name, salary=None):
+    return normalize_vacancy({'name': name, 'employer': {'id': '1'}, 'salary': salary,
+                              'snippet': {'requirement': None}})
+
+
+def test_copy_row_without_salary_uses_null():
+    row = format_copy_row(make_vacancy('Инженер\tпо данным'))
+    assert row == 'Инженер\\tпо данным\t\\N\t\\N\t1\t\\N\tНе указано\n'
+
+
+def test_copy_row_keeps_empty_string():
+    vacancy = make_vacancy('Инженер', {'from': 1000, 'to': None, 'currency': 'RUR'})
+    vacancy['location'] = ''
+    assert format_copy_row(vacancy) == 'Инженер\t1000\t\\N\t1\t\\N\t\n'
+
+
+def test_bad_vacancy_does_not_block_spool(tmp_path):
+    db_manager = FakeDBManager(bad_name='bad')
+    spool = VacancySpool(db_manager, directory=str(tmp_path), segment_size=2)
+    for name in ('good', 'bad', 'next'):
+        spool.write(make_vacancy(name))
+    spool.close()
+
+    assert db_manager.loaded == [('db', 'schema', 'good'), ('db', 'schema', 'next')]
+    assert sorted(os.listdir(tmp_path)) == ['segment-00000001.bad']
+
+
+def test_leftover_segment_replays_into_its_own_schema(tmp_path):
+    old_session = FakeDBManager()
+    old_session.schema_name = 'old_schema'
+    spool = VacancySpool(old_session, directory=str(tmp_path))
+    spool.write(make_vacancy('old'))
+    spool.rotate()
+
+    (tmp_path / 'segment-junk.log').write_text('')
+    new_session = FakeDBManager()
+    spool = VacancySpool(new_session, directory=str(tmp_path))
+    spool.write(make_vacancy('new'))
+    spool.close()
+
+    assert new_session.loaded == [('db', 'old_schema', 'old'), ('db', 'schema', 'new')]
+
+
+def test_outage_during_row_fallback_keeps_segment(tmp_path):
+    db_manager = OutageDBManager(bad_name='bad')
+    spool = VacancySpool(db_manager, directory=str(tmp_path))
+    spool.write(make_vacancy('good'))
+    spool.write(make_vacancy('bad'))
+    spool.close()
+
+    assert db_manager.loaded == []
+    assert os.listdir(tmp_path) == ['segment-00000001.log']
+
+
+def test_truncated_segment_skips_broken_line(tmp_path):
+    spool = VacancySpool(FakeDBManager(), directory=str(tmp_path))
+    spool.write(make_vacancy('Инженер'))
+    spool.write(make_vacancy('Аналитик'))
+    spool.rotate()
+
+    # Обрываем последнюю строку посередине двухбайтового символа, как при сбое
+    path = tmp_path / 'segment-00000001.log'
+    data = path.read_bytes()
+    cut = data.rindex('Аналитик'.encode('utf-8')) + 1
+    path.write_bytes(data[:cut])
+
+    db_manager = FakeDBManager()
+    VacancySpool(db_manager, directory=str(tmp_path)).close()
+    assert db_manager.loaded == [('db', 'schema', 'Инженер')]
+
+
+def test_drain_loop_survives_errors(tmp_path):
+    class BrokenDBManager(FakeDBManager):
+        calls = 0
+
+        def copy_vacancies(self, vacancies, dbname=None, schema_name=None):
+            self.calls += 1
+            if self.calls == 1:
+                raise OSError('диск недоступен')
+            return super().copy_vacancies(vacancies, dbname, schema_name)
+
+    db_manager = BrokenDBManager()
+    spool = VacancySpool(db_manager, directory=str(tmp_path), drain_interval=0.01)
+    spool.write(make_vacancy('good'))
+    with spool.lock:
+        spool.rotate()
+    spool.start()
+    for _ in range(100):
+        if db_manager.loaded:
+            break
+        time.sleep(0.01)
+
+    assert spool.drain_thread.is_alive()
+    spool.close()
+    assert db_manager.loaded == [('db', 'schema', 'good')]